@@ -0,0 +1,375 @@
+
+"""
+KServe inference server for NLLB-200 translation models, configured by main.py.
+
+package_submission.sh bundles this directory into submission/submission.zip.
+"""
+
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Tuple
+from kserve import (InferOutput, InferRequest, InferResponse, Model, ModelServer, model_server)
+from kserve.utils.utils import cpu_count, generate_uuid
+import psutil
+
+# Keep OpenMP threads on distinct physical cores; must be set before ctranslate2 is imported
+os.environ.setdefault("OMP_PROC_BIND", "close")
+os.environ.setdefault("OMP_PLACES", "cores")
+
+import ctranslate2
+import sentencepiece as spm
+
+logger = logging.getLogger(__name__)
+
+# Constants
+MAX_BATCH_SIZE = 32  # Maximum number of requests coalesced into one translate_batch call
+BATCH_WAIT_TIMEOUT_S = 0.002  # How long the batcher waits for more requests to arrive
+MAX_BATCH_TOKENS = 1024  # Token budget per CTranslate2 sub-batch
+MAX_DECODING_LENGTH = 128  # Matches generation_max_length used during fine-tuning
+CACHE_SIZE = 8192  # Number of recent translations kept in memory
+CPU_COMPUTE_TYPE = "int8"
+GPU_COMPUTE_TYPE = "int8_float16"
+INTER_THREADS = 1  # The batcher submits one translate_batch call at a time
+_EOS = ["</s>"]
+_WS_RE = re.compile(r"\s+")
+# The batcher runs one encode or decode at a time; this keeps SentencePiece off the event loop
+_TOKENIZER_POOL = ThreadPoolExecutor(max_workers=1)
+
+def _intra_threads() -> int:
+    """
+    Number of CTranslate2 threads to use per translation.
+
+    CT2_INTRA_THREADS overrides the value. Otherwise physical cores are counted, since
+    hyperthreads share a core's vector units, capped by the CPU affinity mask and cgroup quota.
+
+    Returns:
+        int: Number of intra-op threads.
+    """
+    if os.environ.get("CT2_INTRA_THREADS"):
+        return max(1, int(os.environ["CT2_INTRA_THREADS"]))
+    # kserve's cpu_count() handles the affinity mask and cgroup v1 quotas only
+    cpus = min(psutil.cpu_count(logical=False) or os.cpu_count(), cpu_count())
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, int(quota) // int(period))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus // INTER_THREADS)
+
+@functools.lru_cache(maxsize=None)
+def _get_sp(path: str) -> spm.SentencePieceProcessor:
+    """
+    Load a SentencePiece model, sharing it between all instances in the process.
+
+    Args:
+        path (str): Path to the SentencePiece model file.
+
+    Returns:
+        spm.SentencePieceProcessor: The loaded tokenizer.
+    """
+    return spm.SentencePieceProcessor(model_file=path)
+
+@dataclass(frozen=True)
+class ModelConfig:
+    """
+    Deployment-specific settings of a translation model.
+
+    Attributes:
+        model_dir (str): Directory of the converted CTranslate2 model.
+        src_lang (str): Source language token prepended to every input.
+        tgt_lang (str): Target language token forced as the decoder prefix.
+        spm_file (str): SentencePiece model file name, relative to model_dir.
+    """
+    model_dir: str
+    src_lang: str = "dyu_Latn"
+    tgt_lang: str = "fra_Latn"
+    spm_file: str = "sentencepiece.bpe.model"
+
+class TranslationModel(Model):
+    """
+    KServe inference implementation of NLLB-200 translation model.
+    """
+
+    def __init__(self, name: str, config: ModelConfig):
+        """
+        Initialize the translation model.
+
+        Args:
+            name (str): Name of the model.
+            config (ModelConfig): Model location, languages and tokenizer file.
+        """
+        super().__init__(name)
+        self.name = name
+        self.config = config
+        self._bos = [config.src_lang]
+        self._tgt = [config.tgt_lang]
+        self.ready = False
+        self.model = None
+        self.tokenizer = None
+        self.mpn = None
+        self._queue = None
+        self._batcher = None
+        self._cache = OrderedDict()
+        self.load()
+
+    def load(self) -> None:
+        """
+        Load model and tokenizer from disk.
+        """
+        try:
+            self.tokenizer = _get_sp(os.path.join(self.config.model_dir, self.config.spm_file))
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+            self.model = ctranslate2.Translator(
+                self.config.model_dir,
+                device=device,
+                device_index=0,
+                compute_type=GPU_COMPUTE_TYPE if device == "cuda" else CPU_COMPUTE_TYPE,
+                intra_threads=_intra_threads(),
+                inter_threads=INTER_THREADS,
+            )
+            self._warmup()
+            logger.info('Model and tokenizer loaded on %s', device)
+            self.ready = True
+        except Exception:
+            logger.exception('Error loading model')
+            self.ready = False
+
+    def _warmup(self) -> None:
+        """
+        Run a dummy translation so kernels and buffers are initialized before the first request.
+        """
+        try:
+            self.model.translate_batch([self._bos + ["▁a"] + _EOS], target_prefix=[self._tgt], beam_size=1)
+        except Exception:
+            logger.exception('Warmup failed')
+
+    def preprocess(self, payload: InferRequest, *args, **kwargs) -> str:
+        """
+        Preprocess inference request.
+
+        Args:
+            payload (InferRequest): The input payload containing the text to translate.
+
+        Returns:
+            str: Preprocessed text ready for translation.
+        """
+        text = payload.inputs[0].data[0]
+        # Collapse whitespace runs so equivalent inputs share a cache entry
+        return _WS_RE.sub(" ", text).strip()
+
+    async def predict(self, data: str, *args, **kwargs) -> InferResponse:
+        """
+        Make prediction using the model.
+
+        Recently seen inputs are answered from an LRU cache; other requests are
+        queued and translated together with any that arrive concurrently.
+
+        Args:
+            data (str): Preprocessed input text.
+
+        Returns:
+            InferResponse: KServe inference response containing the translated text.
+        """
+        if not data:
+            return self._create_response("")
+        # The batcher needs the server's event loop, which does not exist yet when load() runs
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.create_task(self._batch_loop())
+        if data in self._cache:
+            self._cache.move_to_end(data)
+            return self._create_response(self._cache[data])
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((data, future))
+        translation = await future
+        if not translation.startswith("Error: "):
+            self._cache[data] = translation
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return self._create_response(translation)
+
+    async def _batch_loop(self) -> None:
+        """
+        Drain the request queue and translate pending requests in batches.
+
+        Requests are collected until MAX_BATCH_SIZE is reached or BATCH_WAIT_TIMEOUT_S
+        has elapsed since the first one, then translated with a single call.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + BATCH_WAIT_TIMEOUT_S
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            texts = [text for text, _ in batch]
+            try:
+                translations = await self._translate(self.model, texts)
+            except Exception as e:
+                # Fail the pending requests rather than the batcher, which would leave later requests hanging
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), translation in zip(batch, translations):
+                if not future.done():
+                    future.set_result(translation)
+
+    async def _translate(self, model, texts: List[str]) -> List[str]:
+        """
+        Translate a batch of input texts using the ctranslate2 library.
+
+        Tokenization and decoding run on the tokenizer pool and translation on the
+        default executor, so the event loop stays free to accept new requests.
+
+        Args:
+            model (ctranslate2.Translator): The translation model.
+            texts (List[str]): The input texts to be translated.
+
+        Returns:
+            List[str]: The translated texts, in the same order as the inputs.
+        """
+        loop = asyncio.get_running_loop()
+        target_prefix = [self._tgt] * len(texts)
+        try:
+            source_sents_subworded, order = await loop.run_in_executor(_TOKENIZER_POOL, self._encode, texts)
+            translations = await loop.run_in_executor(None, functools.partial(
+                model.translate_batch,
+                source_sents_subworded,
+                batch_type="tokens",
+                max_batch_size=MAX_BATCH_TOKENS,
+                beam_size=1,
+                sampling_topk=1,
+                target_prefix=target_prefix,
+                return_scores=False,
+                return_attention=False,
+                return_alternatives=False,
+                no_repeat_ngram_size=0,
+                disable_unk=True,
+                max_decoding_length=MAX_DECODING_LENGTH,
+            ))
+            decoded = await loop.run_in_executor(_TOKENIZER_POOL, self._decode, translations)
+            trans = [None] * len(texts)
+            for i, translation in zip(order, decoded):
+                trans[i] = translation
+        except Exception as e:
+            logger.exception('Translation failed for a batch of %d texts', len(texts))
+            trans = ["Error: " + str(e)] * len(texts)  # Return error message if translation fails
+        return trans
+
+    def _encode(self, texts: List[str]) -> Tuple[List[List[str]], List[int]]:
+        """
+        Tokenize a batch of input texts, sorted by length.
+
+        Args:
+            texts (List[str]): The input texts to be tokenized.
+
+        Returns:
+            Tuple[List[List[str]], List[int]]: The subworded sentences and, for each
+            of them, the index of the input text it came from.
+        """
+        # A single encode call over the whole batch runs SentencePiece's C++ batch loop
+        pieces_batch = self.tokenizer.encode(texts, out_type=str)
+        source_sents_subworded = [self._bos + pieces + _EOS for pieces in pieces_batch]
+        # Group sentences of similar length to minimise padding within each sub-batch
+        order = sorted(range(len(texts)), key=lambda i: len(source_sents_subworded[i]))
+        return [source_sents_subworded[i] for i in order], order
+
+    def _decode(self, translations: List[ctranslate2.TranslationResult]) -> List[str]:
+        """
+        Detokenize the best hypothesis of each translation result.
+
+        Args:
+            translations (List[ctranslate2.TranslationResult]): The translation results.
+
+        Returns:
+            List[str]: The translated texts.
+        """
+        hypotheses = []
+        for result in translations:
+            translation = result.hypotheses[0]
+            if self._tgt[0] in translation:
+                translation.remove(self._tgt[0])
+            hypotheses.append(translation)
+        # SentencePiece picks the batch decode path from the first element, so an empty
+        # hypothesis (the model stopping right after the language token) must not be passed in
+        decoded = [""] * len(hypotheses)
+        non_empty = [i for i, hypothesis in enumerate(hypotheses) if hypothesis]
+        if non_empty:
+            texts = self.tokenizer.decode([hypotheses[i] for i in non_empty])
+            for i, text in zip(non_empty, texts):
+                decoded[i] = text
+        return decoded
+
+    def _create_response(self, translation: str) -> InferResponse:
+        """
+        Create InferResponse object.
+
+        Args:
+            translation (str): Translated text.
+
+        Returns:
+            InferResponse: KServe inference response object.
+        """
+        return InferResponse(
+            model_name=self.name,
+            infer_outputs=[InferOutput(name="output-0", shape=[1], datatype="BYTES", data=[translation.encode("utf-8")])],
+            response_id=generate_uuid()
+        )
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(parents=[model_server.parser])
+    # Recent KServe versions define '--model_name' themselves; only add it to the local parser otherwise
+    if '--model_name' not in parser._option_string_actions:
+        parser.add_argument(
+            '--model_name',
+            default='model',
+            help='The name that the model is served under.'
+        )
+    return parser.parse_args()
+
+def make_model(config: ModelConfig, name: str = "model") -> TranslationModel:
+    """
+    Create and load a translation model.
+
+    Args:
+        config (ModelConfig): Model location, languages and tokenizer file.
+        name (str): Name that the model is served under.
+
+    Returns:
+        TranslationModel: The loaded model.
+    """
+    return TranslationModel(name, config)
+
+def run(config: ModelConfig) -> None:
+    """
+    Start the model server for the given model configuration.
+
+    Args:
+        config (ModelConfig): Model location, languages and tokenizer file.
+    """
+    args = parse_arguments()
+    # KServe configures only its own loggers, and only once the server starts, which is after load()
+    logging.basicConfig(level=logging.INFO)
+    model = make_model(config, args.model_name)
+    ModelServer().start([model])
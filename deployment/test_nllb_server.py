@@ -0,0 +1,41 @@
+
+"""
+Tests for the shared NLLB-200 KServe inference server.
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("kserve")
+pytest.importorskip("ctranslate2")
+
+import nllb_server
+
+SPM_FILE = os.path.join(os.path.dirname(__file__), "..", "tokenizer_custom", "nllb", "sentencepiece.bpe.model")
+
+@pytest.fixture
+def model():
+    """
+    TranslationModel with the NLLB tokenizer loaded and no translator.
+    """
+    model = nllb_server.TranslationModel.__new__(nllb_server.TranslationModel)
+    model.tokenizer = nllb_server._get_sp(SPM_FILE)
+    model._tgt = ["fra_Latn"]
+    return model
+
+def test_decode_with_empty_first_hypothesis(model):
+    translations = [
+        SimpleNamespace(hypotheses=[["fra_Latn"]]),
+        SimpleNamespace(hypotheses=[["fra_Latn", "▁a"]]),
+        SimpleNamespace(hypotheses=[["fra_Latn"]]),
+    ]
+    assert model._decode(translations) == ["", "a", ""]
+
+def test_decode_all_empty(model):
+    assert model._decode([SimpleNamespace(hypotheses=[["fra_Latn"]])]) == [""]
+
+def test_intra_threads_env_override(monkeypatch):
+    monkeypatch.setenv("CT2_INTRA_THREADS", "3")
+    assert nllb_server._intra_threads() == 3
@@ -0,0 +1,12 @@
+#!/bin/sh
+# Build submission/submission.zip from the single source in deployment/.
+# The zip holds image_name.txt, README.md and the deployment/ build context (without saved_model).
+set -e
+cd "$(dirname "$0")"
+STAGE=$(mktemp -d)
+trap 'rm -rf "$STAGE"' EXIT
+mkdir "$STAGE/deployment"
+cp deployment/Dockerfile deployment/requirements.txt deployment/main.py deployment/nllb_server.py "$STAGE/deployment/"
+cp submission/image_name.txt submission/README.md "$STAGE/"
+rm -f submission/submission.zip
+(cd "$STAGE" && zip -qrX "$OLDPWD/submission/submission.zip" image_name.txt deployment README.md)